@@ -1,4 +1,5 @@
 import os
+import threading
 from dotenv import load_dotenv
 from helpers import logger, cloud
 from services import reversion, data, momentum
@@ -26,6 +27,9 @@ if __name__ == '__main__':
         logger.error(f"Error in decrypting env file: {e}")
     # Load secrets from the env file
     load_dotenv()
+    # Optionally warm up AWS connections while the service starts
+    if os.getenv('NEXUS_AWS_WARMUP') == '1':
+        threading.Thread(target=cloud.warm_up_aws_clients, daemon=True).start()
     # Run the respective service
     match os.getenv('SERVICE'):
         case 'Data':
@@ -0,0 +1,252 @@
+import asyncio
+import orjson
+import weakref
+from contextlib import AsyncExitStack, asynccontextmanager
+from aiobotocore.config import AioConfig
+from aiobotocore.session import get_session
+from botocore.exceptions import ClientError
+from helpers import cloud
+
+# aiohttp-backed clients only work on the event loop that created them,
+# so the shared clients, their exit stack and lock are kept per loop
+_loop_states = weakref.WeakKeyDictionary()
+
+
+def _get_loop_state() -> dict:
+    """
+    Returns the client state for the running event loop.
+    """
+    loop = asyncio.get_running_loop()
+    state = _loop_states.get(loop)
+    if state is None:
+        state = {'lock': asyncio.Lock(), 'clients': None, 'stack': None}
+        _loop_states[loop] = state
+    return state
+
+
+async def get_aws_clients(stack: AsyncExitStack) -> dict:
+    """
+    Initializes and returns async AWS clients.
+    The clients are entered into the given stack, which closes them.
+    """
+    session = get_session()
+    config = AioConfig().merge(cloud.AWS_CLIENT_CONFIG)
+    settings = cloud.get_aws_settings()
+    return {
+        service: await stack.enter_async_context(
+            session.create_client(service, config=config, **settings)
+        )
+        for service in ('sns', 'sqs', 'secretsmanager')
+    }
+
+
+async def get_client(service):
+    """
+    Returns an async AWS client for the specified service.
+    Initializes the clients for the running event loop if they
+    haven't been initialized yet.
+    """
+    state = _get_loop_state()
+    if state['clients'] is None:
+        async with state['lock']:
+            if state['clients'] is None:
+                stack = AsyncExitStack()
+                try:
+                    clients = await get_aws_clients(stack)
+                except BaseException:
+                    # Close any clients opened before the failure
+                    await stack.aclose()
+                    raise
+                state['stack'] = stack
+                state['clients'] = clients
+    return state['clients'][service]
+
+
+async def close_aws_clients() -> None:
+    """
+    Close the running event loop's AWS clients and their connection pools.
+    Must be awaited before the event loop is closed.
+    """
+    state = _get_loop_state()
+    async with state['lock']:
+        if state['stack'] is not None:
+            await state['stack'].aclose()
+        state['clients'] = None
+        state['stack'] = None
+
+
+@asynccontextmanager
+async def managed_aws_clients():
+    """
+    Async context manager yielding the running event loop's AWS clients
+    and closing them on exit.
+
+    Example:
+        async with managed_aws_clients():
+            messages = await apoll_sqs_message(queue_url)
+    """
+    try:
+        yield {
+            service: await get_client(service)
+            for service in ('sns', 'sqs', 'secretsmanager')
+        }
+    finally:
+        await close_aws_clients()
+
+
+async def apublish_sns_message(data: str, topic: str) -> dict:
+    """
+    Publish a message to an SNS topic.
+
+    Args:
+        data (str): The message data to publish.
+        topic (str): The ARN of the SNS topic.
+
+    Returns:
+        dict: The response from the SNS service.
+
+    Raises:
+        NoCredentialsError: If AWS credentials are not found.
+        PartialCredentialsError: If AWS credentials are incomplete.
+        SNSPublishError: If there is an error publishing the message.
+    """
+    sns_client = await get_client('sns')
+    try:
+        response = await sns_client.publish(
+            TopicArn=topic,
+            Message=data,
+        )
+        return response
+    except ClientError as e:
+        raise cloud.SNSPublishError(
+            "Failed to publish message to SNS topic",
+            cloud.get_error_code(e)
+        ) from e
+
+
+async def apoll_sqs_message(
+    queue_url: str,
+    max_messages: int = 10,
+    wait_time_seconds: int = 20
+) -> list:
+    """
+    Poll messages from an SQS queue.
+
+    Args:
+        queue_url (str): The URL of the SQS queue.
+        max_messages (int, optional):
+        The maximum number of messages to retrieve. Defaults to 10.
+        wait_time_seconds (int, optional): The duration (in seconds)
+        to wait for messages. Defaults to 20, the SQS long-poll maximum.
+
+    Returns:
+        list: A list of messages retrieved from the queue.
+
+    Raises:
+        NoCredentialsError: If AWS credentials are not found.
+        PartialCredentialsError: If AWS credentials are incomplete.
+        SQSPollError: If there is an error polling messages.
+    """
+    sqs_client = await get_client('sqs')
+    try:
+        response = await sqs_client.receive_message(
+            QueueUrl=queue_url,
+            MaxNumberOfMessages=max_messages,
+            WaitTimeSeconds=wait_time_seconds,
+        )
+        return response.get('Messages', [])
+    except ClientError as e:
+        raise cloud.SQSPollError(
+            "Failed to poll messages from SQS queue",
+            cloud.get_error_code(e)
+        ) from e
+
+
+async def adelete_sqs_message(queue_url: str, receipt_handle: str) -> None:
+    """
+    Delete a message from an SQS queue.
+
+    Args:
+        queue_url (str): The URL of the SQS queue.
+        receipt_handle (str): The receipt handle of the message to delete.
+
+    Raises:
+        NoCredentialsError: If AWS credentials are not found.
+        PartialCredentialsError: If AWS credentials are incomplete.
+        SQSDeleteError: If there is an error deleting the message.
+    """
+    sqs_client = await get_client('sqs')
+    try:
+        await sqs_client.delete_message(
+            QueueUrl=queue_url,
+            ReceiptHandle=receipt_handle,
+        )
+    except ClientError as e:
+        raise cloud.SQSDeleteError(
+            "Failed to delete message from SQS queue",
+            cloud.get_error_code(e)
+        ) from e
+
+
+async def asubscribe_sqs_to_sns(queue_arn: str, topic_arn: str) -> dict:
+    """
+    Subscribe an SQS queue to an SNS topic.
+
+    Args:
+        queue_arn (str): The ARN of the SQS queue.
+        topic_arn (str): The ARN of the SNS topic.
+
+    Returns:
+        dict: The response from the SNS service.
+
+    Raises:
+        NoCredentialsError: If AWS credentials are not found.
+        PartialCredentialsError: If AWS credentials are incomplete.
+        SNSSubscribeError: If there is an error subscribing the queue to the topic.
+    """
+    sns_client = await get_client('sns')
+    try:
+        response = await sns_client.subscribe(
+            Protocol='sqs',
+            TopicArn=topic_arn,
+            Endpoint=queue_arn,
+        )
+        return response
+    except ClientError as e:
+        raise cloud.SNSSubscribeError(
+            "Failed to subscribe SQS queue to SNS topic",
+            cloud.get_error_code(e)
+        ) from e
+
+
+async def aretrieve_secret(secret_name: str) -> dict:
+    """
+    Retrieve a secret from AWS Secrets Manager.
+    Shares the in-memory secret cache with cloud.retrieve_secret.
+
+    Args:
+        secret_name (str): The name or ARN of the secret.
+
+    Returns:
+        dict: The secret value as a dictionary.
+
+    Raises:
+        NoCredentialsError: If AWS credentials are not found.
+        PartialCredentialsError: If AWS credentials are incomplete.
+        SecretRetrievalError: If there is an error retrieving the secret.
+    """
+    secret = cloud.get_cached_secret(secret_name)
+    if secret is not None:
+        return secret
+    secretsmanager_client = await get_client('secretsmanager')
+    try:
+        response = await secretsmanager_client.get_secret_value(
+            SecretId=secret_name,
+        )
+        secret = orjson.loads(response.get('SecretString'))
+        return cloud.cache_secret(secret_name, secret)
+    except ClientError as e:
+        raise cloud.SecretRetrievalError(
+            "Failed to retrieve secret from Secrets Manager",
+            cloud.get_error_code(e)
+        ) from e
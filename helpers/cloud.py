@@ -1,45 +1,254 @@
 import boto3
-import json
+import copy
 import os
+import threading
+import time
 import gnupg
-from botocore.exceptions import (
-                                 ClientError,
-                                 NoCredentialsError,
-                                 PartialCredentialsError
-                                 )
+import orjson
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from cachetools import TTLCache
+from botocore.config import Config
+from botocore.exceptions import ClientError
+from typing import Any, Optional
+from helpers import logger
 
-# Initialize a placeholder for AWS clients
+# Initialize logger
+logger = logger.Logger('cloud.py')
+
+
+class CloudError(RuntimeError):
+    """Base error for failed AWS calls.
+
+    Attributes:
+        code: The AWS error code (e.g. 'ThrottlingException'), if any,
+            so callers can decide whether a failure is worth retrying.
+    """
+
+    def __init__(self, message: str, code: Optional[str] = None):
+        super().__init__(message)
+        self.code = code
+
+
+class SNSPublishError(CloudError):
+    """Raised when publishing to an SNS topic fails.
+
+    Attributes:
+        result: For batch publishes, the 'Successful' and 'Failed' entries
+            of the batches sent before the failure, if any.
+    """
+
+    def __init__(
+        self,
+        message: str,
+        code: Optional[str] = None,
+        result: Optional[dict] = None
+    ):
+        super().__init__(message, code)
+        self.result = result
+
+
+class SNSSubscribeError(CloudError):
+    """Raised when subscribing an SQS queue to an SNS topic fails."""
+
+
+class SQSPollError(CloudError):
+    """Raised when polling an SQS queue fails.
+
+    Attributes:
+        result: For multi-queue polls, the messages already received
+            from the queues that were polled successfully, by queue URL.
+    """
+
+    def __init__(
+        self,
+        message: str,
+        code: Optional[str] = None,
+        result: Optional[dict] = None
+    ):
+        super().__init__(message, code)
+        self.result = result
+
+
+class SQSDeleteError(CloudError):
+    """Raised when deleting messages from an SQS queue fails."""
+
+
+class SecretRetrievalError(CloudError):
+    """Raised when retrieving a secret from Secrets Manager fails."""
+
+
+def get_error_code(error: ClientError) -> Optional[str]:
+    """
+    Returns the AWS error code carried by a ClientError.
+    """
+    return error.response.get('Error', {}).get('Code')
+
+
+# Initialize placeholders for the AWS session and clients
+aws_session = None
+_aws_session_lock = threading.Lock()
 aws_clients = None
+_aws_clients_created_at = 0.0
+_aws_clients_lock = threading.Lock()
+
+# Rebuild clients periodically so long-lived workers never reuse keep-alive
+# connections that AWS load balancers have silently dropped (~350s idle)
+AWS_CLIENT_MAX_AGE = 300
+
+# Shared client config: keep connections alive and allow enough pooled
+# connections for concurrent pollers/publishers. The read timeout must
+# exceed the 20 second SQS long-poll wait.
+AWS_CLIENT_CONFIG = Config(
+    max_pool_connections=50,
+    tcp_keepalive=True,
+    connect_timeout=5,
+    read_timeout=25,
+    retries={'mode': 'adaptive', 'max_attempts': 5}
+)
+
+
+# In-process cache of parsed secrets, refreshed hourly
+_secret_cache = TTLCache(maxsize=128, ttl=3600)
+_secret_cache_lock = threading.RLock()
+
+
+# SNS PublishBatch limits per request
+SNS_BATCH_MAX_MESSAGES = 10
+SNS_BATCH_MAX_BYTES = 256 * 1024
+
+# Initialize a placeholder for the shared GPG instance
+gpg_instance = None
+_gpg_lock = threading.Lock()
+
+# Force AES-256 for symmetric GPG encryption so hardware AES is used
+# rather than whatever legacy default the local gpg.conf selects
+GPG_CIPHER_ARGS = [
+    '--cipher-algo', 'AES256',
+    '--s2k-cipher-algo', 'AES256'
+]
+
+
+def get_aws_settings() -> dict:
+    """
+    Reads and validates the AWS settings from the environment.
+    Access keys are optional so the default credential chain
+    (e.g. an ECS task role) can be used, but must be set together.
+
+    Returns:
+        dict: The access key, secret key and region for an AWS session.
+
+    Raises:
+        Exception: If the region is missing or the credentials are incomplete.
+    """
+    access_key = os.environ.get('AWS_ACCESS_KEY_ID')
+    secret_key = os.environ.get('AWS_SECRET_ACCESS_KEY')
+    region = os.environ.get('REGION')
+    if not region:
+        raise Exception('REGION environment variable is not set.')
+    if bool(access_key) != bool(secret_key):
+        raise Exception('AWS credentials are missing or incomplete.')
+    return {
+        'aws_access_key_id': access_key,
+        'aws_secret_access_key': secret_key,
+        'region_name': region,
+    }
+
+
+def get_aws_session():
+    """
+    Lazily initializes and returns the shared AWS session.
+    Ensures environment variables are loaded before creating the session,
+    which is then reused so its resolved credentials are kept.
+    """
+    global aws_session
+    if aws_session is None:
+        with _aws_session_lock:
+            if aws_session is None:
+                aws_session = boto3.Session(**get_aws_settings())
+    return aws_session
 
 
 def get_aws_clients():
     """
-    Lazily initializes and returns AWS clients.
-    Ensures environment variables are loaded before creating clients.
+    Initializes and returns AWS clients from the shared session.
     """
-    session = boto3.Session(
-        aws_access_key_id=os.environ.get('AWS_ACCESS_KEY_ID'),
-        aws_secret_access_key=os.environ.get('AWS_SECRET_ACCESS_KEY'),
-        region_name=os.environ.get('REGION')
-    )
+    session = get_aws_session()
     return {
-        'sns': session.client('sns'),
-        'sqs': session.client('sqs'),
-        'secretsmanager': session.client('secretsmanager'),
+        'sns': session.client('sns', config=AWS_CLIENT_CONFIG),
+        'sqs': session.client('sqs', config=AWS_CLIENT_CONFIG),
+        'secretsmanager': session.client(
+            'secretsmanager',
+            config=AWS_CLIENT_CONFIG
+        ),
     }
 
 
 def get_client(service):
     """
     Returns an AWS client for the specified service.
-    Initializes the clients if they haven't been initialized yet.
+    Initializes the clients if they haven't been initialized yet or are
+    older than AWS_CLIENT_MAX_AGE, using double-checked locking so
+    concurrent callers share one set. Replaced clients are closed so
+    their pooled connections are released.
     """
-    global aws_clients
-    if aws_clients is None:
-        aws_clients = get_aws_clients()
+    global aws_clients, _aws_clients_created_at
+    expired_clients = None
+    if aws_clients is None or _aws_clients_expired():
+        with _aws_clients_lock:
+            if aws_clients is None or _aws_clients_expired():
+                expired_clients = aws_clients
+                aws_clients = get_aws_clients()
+                _aws_clients_created_at = time.monotonic()
+    if expired_clients is not None:
+        # Only idle connections are dropped; in-flight requests finish
+        for client in expired_clients.values():
+            client.close()
     return aws_clients[service]
 
 
+def _aws_clients_expired() -> bool:
+    return time.monotonic() - _aws_clients_created_at > AWS_CLIENT_MAX_AGE
+
+
+def warm_up_aws_clients() -> None:
+    """
+    Initializes the AWS clients and issues a cheap call per service so
+    credential resolution, DNS and TLS handshakes happen ahead of the
+    first real request. Call this once the environment is loaded.
+
+    An error response from AWS (e.g. AccessDenied when the role lacks
+    list permissions) still leaves a warm connection in the pool, so it
+    is logged as informational; any other failure is logged as a warning.
+    """
+    warm_up_calls = [
+        ('sns', 'list_topics', {}),
+        ('sqs', 'list_queues', {'MaxResults': 1}),
+        ('secretsmanager', 'list_secrets', {'MaxResults': 1}),
+    ]
+    for service, operation, params in warm_up_calls:
+        try:
+            getattr(get_client(service), operation)(**params)
+        except ClientError as e:
+            logger.info(
+                f'AWS {service} warm-up call returned {get_error_code(e)}, connection is warm'
+            )
+        except Exception as e:
+            logger.warning(f'Failed to warm up AWS {service} client: {e}')
+
+
+def get_gpg():
+    """
+    Returns the shared GPG instance.
+    Initializes it if it hasn't been initialized yet.
+    """
+    global gpg_instance
+    if gpg_instance is None:
+        with _gpg_lock:
+            if gpg_instance is None:
+                gpg_instance = gnupg.GPG()
+    return gpg_instance
+
+
 def publish_sns_message(data: str, topic: str) -> dict:
     """
     Publish a message to an SNS topic.
@@ -54,7 +263,7 @@ def publish_sns_message(data: str, topic: str) -> dict:
     Raises:
         NoCredentialsError: If AWS credentials are not found.
         PartialCredentialsError: If AWS credentials are incomplete.
-        ClientError: If there is an error publishing the message.
+        SNSPublishError: If there is an error publishing the message.
     """
     sns_client = get_client('sns')
     try:
@@ -63,16 +272,83 @@ def publish_sns_message(data: str, topic: str) -> dict:
             Message=data,
         )
         return response
-    except (NoCredentialsError, PartialCredentialsError) as e:
-        raise Exception('AWS credentials are missing or incomplete.') from e
     except ClientError as e:
-        raise Exception(f"Failed to publish message to SNS topic: {e}") from e
+        raise SNSPublishError(
+            "Failed to publish message to SNS topic",
+            get_error_code(e)
+        ) from e
+
+
+def _sns_batches(messages: list) -> list:
+    """
+    Split messages into SNS batch entries that respect both the
+    per-request message count and total payload size limits.
+    """
+    batches = []
+    batch = []
+    batch_size = 0
+    for i, message in enumerate(messages):
+        message_size = len(message.encode('utf-8'))
+        if batch and (
+            len(batch) == SNS_BATCH_MAX_MESSAGES
+            or batch_size + message_size > SNS_BATCH_MAX_BYTES
+        ):
+            batches.append(batch)
+            batch = []
+            batch_size = 0
+        batch.append({'Id': str(i), 'Message': message})
+        batch_size += message_size
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def publish_sns_messages(messages: list, topic: str) -> dict:
+    """
+    Publish multiple messages to an SNS topic in batches of up to 10
+    messages and 256 KiB.
+
+    Entry Ids are the indexes of the messages in the input list. Batches
+    are sent in order, so if one fails the earlier batches have already
+    been published; their entries are attached to the raised error.
+
+    Args:
+        messages (list): The message data strings to publish.
+        topic (str): The ARN of the SNS topic.
+
+    Returns:
+        dict: The aggregated 'Successful' and 'Failed' entries
+        from the SNS service.
+
+    Raises:
+        NoCredentialsError: If AWS credentials are not found.
+        PartialCredentialsError: If AWS credentials are incomplete.
+        SNSPublishError: If there is an error publishing the messages,
+        with the partial 'Successful'/'Failed' entries in its result.
+    """
+    sns_client = get_client('sns')
+    result = {'Successful': [], 'Failed': []}
+    try:
+        for batch in _sns_batches(messages):
+            response = sns_client.publish_batch(
+                TopicArn=topic,
+                PublishBatchRequestEntries=batch,
+            )
+            result['Successful'].extend(response.get('Successful', []))
+            result['Failed'].extend(response.get('Failed', []))
+        return result
+    except ClientError as e:
+        raise SNSPublishError(
+            "Failed to publish messages to SNS topic",
+            get_error_code(e),
+            result
+        ) from e
 
 
 def poll_sqs_message(
     queue_url: str,
-    max_messages: int = 1,
-    wait_time_seconds: int = 10
+    max_messages: int = 10,
+    wait_time_seconds: int = 20
 ) -> list:
     """
     Poll messages from an SQS queue.
@@ -80,9 +356,9 @@ def poll_sqs_message(
     Args:
         queue_url (str): The URL of the SQS queue.
         max_messages (int, optional):
-        The maximum number of messages to retrieve. Defaults to 1.
+        The maximum number of messages to retrieve. Defaults to 10.
         wait_time_seconds (int, optional): The duration (in seconds)
-        to wait for messages. Defaults to 10.
+        to wait for messages. Defaults to 20, the SQS long-poll maximum.
 
     Returns:
         list: A list of messages retrieved from the queue.
@@ -90,7 +366,7 @@ def poll_sqs_message(
     Raises:
         NoCredentialsError: If AWS credentials are not found.
         PartialCredentialsError: If AWS credentials are incomplete.
-        ClientError: If there is an error polling messages.
+        SQSPollError: If there is an error polling messages.
     """
     sqs_client = get_client('sqs')
     try:
@@ -100,10 +376,66 @@ def poll_sqs_message(
             WaitTimeSeconds=wait_time_seconds,
         )
         return response.get('Messages', [])
-    except (NoCredentialsError, PartialCredentialsError) as e:
-        raise Exception('AWS credentials are missing or incomplete.') from e
     except ClientError as e:
-        raise Exception(f"Failed to poll messages from SQS queue: {e}") from e
+        raise SQSPollError(
+            "Failed to poll messages from SQS queue",
+            get_error_code(e)
+        ) from e
+
+
+def poll_many_queues(
+    queue_urls: list,
+    max_messages: int = 10,
+    wait_time_seconds: int = 20
+) -> dict:
+    """
+    Poll messages from several SQS queues concurrently,
+    using one worker thread per queue.
+
+    Args:
+        queue_urls (list): The URLs of the SQS queues.
+        max_messages (int, optional):
+        The maximum number of messages to retrieve per queue. Defaults to 10.
+        wait_time_seconds (int, optional): The duration (in seconds)
+        to wait for messages. Defaults to 20.
+
+    Returns:
+        dict: A mapping of queue URL to the list of messages retrieved.
+
+    Raises:
+        SQSPollError: If polling any of the queues fails. Every queue is
+        still polled, and the messages received from the others are in
+        the error's result so they can be processed rather than left
+        invisible until their visibility timeout expires.
+    """
+    if not queue_urls:
+        return {}
+    results = {}
+    errors = {}
+    with ThreadPoolExecutor(max_workers=len(queue_urls)) as executor:
+        futures = {
+            executor.submit(
+                poll_sqs_message,
+                queue_url,
+                max_messages,
+                wait_time_seconds
+            ): queue_url
+            for queue_url in queue_urls
+        }
+        for future in as_completed(futures):
+            try:
+                results[futures[future]] = future.result()
+            except Exception as e:
+                errors[futures[future]] = e
+    if errors:
+        failed_urls = [url for url in queue_urls if url in errors]
+        first_error = errors[failed_urls[0]]
+        raise SQSPollError(
+            f"Failed to poll messages from SQS queues: {failed_urls}",
+            getattr(first_error, 'code', None),
+            results
+        ) from first_error
+    return results
 
 
 def delete_sqs_message(queue_url: str, receipt_handle: str) -> None:
@@ -117,18 +449,50 @@ def delete_sqs_message(queue_url: str, receipt_handle: str) -> None:
     Raises:
         NoCredentialsError: If AWS credentials are not found.
         PartialCredentialsError: If AWS credentials are incomplete.
-        ClientError: If there is an error deleting the message.
+        SQSDeleteError: If there is an error deleting the message.
+    """
+    delete_sqs_messages(queue_url, [receipt_handle])
+
+
+def delete_sqs_messages(queue_url: str, receipt_handles: list) -> None:
+    """
+    Delete multiple messages from an SQS queue in batches of up to 10.
+
+    Args:
+        queue_url (str): The URL of the SQS queue.
+        receipt_handles (list): The receipt handles of the messages to delete.
+
+    Raises:
+        NoCredentialsError: If AWS credentials are not found.
+        PartialCredentialsError: If AWS credentials are incomplete.
+        SQSDeleteError: If there is an error deleting the messages or
+        any message in a batch could not be deleted.
     """
     sqs_client = get_client('sqs')
+    failed = []
     try:
-        sqs_client.delete_message(
-            QueueUrl=queue_url,
-            ReceiptHandle=receipt_handle,
-        )
-    except (NoCredentialsError, PartialCredentialsError) as e:
-        raise Exception('AWS credentials are missing or incomplete.') from e
+        for start in range(0, len(receipt_handles), 10):
+            chunk = receipt_handles[start:start + 10]
+            response = sqs_client.delete_message_batch(
+                QueueUrl=queue_url,
+                Entries=[
+                    {'Id': str(start + i), 'ReceiptHandle': receipt_handle}
+                    for i, receipt_handle in enumerate(chunk)
+                ],
+            )
+            failed.extend(response.get('Failed', []))
     except ClientError as e:
-        raise Exception(f"Failed to delete message from SQS queue: {e}") from e
+        raise SQSDeleteError(
+            "Failed to delete messages from SQS queue",
+            get_error_code(e)
+        ) from e
+    if failed:
+        # Entry Ids are indexes into receipt_handles
+        failed_handles = [receipt_handles[int(entry['Id'])] for entry in failed]
+        raise SQSDeleteError(
+            f"Failed to delete messages from SQS queue: {failed_handles}",
+            failed[0].get('Code')
+        )
 
 
 def subscribe_sqs_to_sns(queue_arn: str, topic_arn: str) -> dict:
@@ -145,7 +509,7 @@ def subscribe_sqs_to_sns(queue_arn: str, topic_arn: str) -> dict:
     Raises:
         NoCredentialsError: If AWS credentials are not found.
         PartialCredentialsError: If AWS credentials are incomplete.
-        ClientError: If there is an error subscribing the queue to the topic.
+        SNSSubscribeError: If there is an error subscribing the queue to the topic.
     """
     sns_client = get_client('sns')
     try:
@@ -155,17 +519,37 @@ def subscribe_sqs_to_sns(queue_arn: str, topic_arn: str) -> dict:
             Endpoint=queue_arn,
         )
         return response
-    except (NoCredentialsError, PartialCredentialsError) as e:
-        raise Exception('AWS credentials are missing or incomplete.') from e
     except ClientError as e:
-        raise Exception(
-            f"Failed to subscribe SQS queue to SNS topic: {e}"
+        raise SNSSubscribeError(
+            "Failed to subscribe SQS queue to SNS topic",
+            get_error_code(e)
         ) from e
 
 
+def get_cached_secret(secret_name: str) -> Any:
+    """
+    Returns a copy of a cached secret, or None if it is not cached.
+    """
+    with _secret_cache_lock:
+        secret = _secret_cache.get(secret_name)
+    return copy.copy(secret)
+
+
+def cache_secret(secret_name: str, secret: Any) -> Any:
+    """
+    Caches a parsed secret and returns a copy of it. Secrets may be any
+    JSON value (e.g. a plain string passphrase), so only containers are
+    actually copied.
+    """
+    with _secret_cache_lock:
+        _secret_cache[secret_name] = secret
+    return copy.copy(secret)
+
+
 def retrieve_secret(secret_name: str) -> dict:
     """
     Retrieve a secret from AWS Secrets Manager.
+    Results are cached in memory for up to an hour.
 
     Args:
         secret_name (str): The name or ARN of the secret.
@@ -176,21 +560,23 @@ def retrieve_secret(secret_name: str) -> dict:
     Raises:
         NoCredentialsError: If AWS credentials are not found.
         PartialCredentialsError: If AWS credentials are incomplete.
-        ClientError: If there is an error retrieving the secret.
+        SecretRetrievalError: If there is an error retrieving the secret.
     """
+    secret = get_cached_secret(secret_name)
+    if secret is not None:
+        return secret
     secretsmanager_client = get_client('secretsmanager')
     try:
         response = secretsmanager_client.get_secret_value(
             SecretId=secret_name,
         )
-        secret = response.get('SecretString')
-        return json.loads(secret)
-    except (NoCredentialsError, PartialCredentialsError) as e:
-        raise Exception('AWS credentials are missing or incomplete.') from e
+        secret = orjson.loads(response.get('SecretString'))
+        return cache_secret(secret_name, secret)
     except ClientError as e:
-        raise Exception(
-            f"Failed to retrieve secret from Secrets Manager: {e}"
-            ) from e
+        raise SecretRetrievalError(
+            "Failed to retrieve secret from Secrets Manager",
+            get_error_code(e)
+        ) from e
 
 
 def decrypt_env_file(
@@ -212,23 +598,33 @@ def decrypt_env_file(
         Exception: If decryption fails or the file cannot be read.
     """
     try:
-        # Intialize GPG
-        gpg = gnupg.GPG()
-        # Read the encrypted file
+        gpg = get_gpg()
+        # Decrypt the encrypted file straight to the output file
         with open(env_file, 'rb') as file:
-            decrypted_data = gpg.decrypt_file(file, passphrase=password)
+            decrypted_data = gpg.decrypt_file(
+                file,
+                passphrase=password,
+                output=output_file
+            )
         # Check if decryption was successful
         if not decrypted_data.ok:
             raise Exception('Failed to decrypt file.')
-        # Split the decrypted data into lines and remove empty lines
-        lines = [
-            line.strip()
-            for line in str(decrypted_data).splitlines()
-            if line.strip()
-        ]
-        # Write the decrypted data to the output file
-        with open(output_file, 'w') as file:
-            file.write('\n'.join(lines))
+        # Stream the output file line by line, removing empty lines
+        stripped_file = f"{output_file}.tmp"
+        try:
+            with open(output_file, 'r') as src, open(stripped_file, 'w') as dst:
+                separator = ''
+                for line in src:
+                    line = line.strip()
+                    if line:
+                        dst.write(separator + line)
+                        separator = '\n'
+            os.replace(stripped_file, output_file)
+        except Exception:
+            # Don't leave decrypted secrets behind in the temp file
+            if os.path.exists(stripped_file):
+                os.remove(stripped_file)
+            raise
     except Exception as e:
         raise Exception(f"Failed to decrypt environment file: {e}") from e
 
@@ -246,25 +642,19 @@ def encrypt_env_file(password: str, input_env_file: str, output_env_file: str) -
         Exception: If encryption fails or the file cannot be written.
     """
     try:
-        # Initialize GPG
-        gpg = gnupg.GPG()
-        # Convert environment variables to a string
-        # Read the content of the .env file
-        with open(input_env_file, 'r') as file:
-            env_data = file.read()
-
-        # Encrypt the data
-        encrypted_data = gpg.encrypt(
-            env_data,
-            recipients=None,
-            symmetric=True,
-            passphrase=password
-        )
+        gpg = get_gpg()
+        # Stream the .env file through GPG straight to the output file
+        with open(input_env_file, 'rb') as file:
+            encrypted_data = gpg.encrypt_file(
+                file,
+                recipients=None,
+                symmetric=True,
+                passphrase=password,
+                output=output_env_file,
+                extra_args=GPG_CIPHER_ARGS
+            )
         # Check if encryption was successful
         if not encrypted_data.ok:
             raise Exception(f"Encryption failed: {encrypted_data.stderr}")
-        # Write the encrypted data to the output file
-        with open(output_env_file, 'wb') as file:
-            file.write(encrypted_data.data)
     except Exception as e:
         raise Exception(f"Failed to encrypt environment file: {e}") from e
@@ -0,0 +1,78 @@
+import asyncio
+import pytest
+from botocore.stub import Stubber
+from nexus.helpers import async_cloud
+
+QUEUE_URL = 'https://sqs.us-east-2.amazonaws.com/123456789012/test-queue'
+
+
+@pytest.fixture(autouse=True)
+def aws_env(monkeypatch):
+    monkeypatch.setenv('AWS_ACCESS_KEY_ID', 'testing')
+    monkeypatch.setenv('AWS_SECRET_ACCESS_KEY', 'testing')
+    monkeypatch.setenv('REGION', 'us-east-2')
+
+
+async def poll_once():
+    async with async_cloud.managed_aws_clients() as clients:
+        with Stubber(clients['sqs']) as stubber:
+            stubber.add_response(
+                'receive_message',
+                {'Messages': [{'MessageId': '1', 'Body': 'body'}]},
+            )
+            messages = await async_cloud.apoll_sqs_message(QUEUE_URL)
+        return clients['sqs'], messages
+
+
+# Test client lifecycle across event loops
+def test_clients_are_created_per_event_loop():
+    first_client, first_messages = asyncio.run(poll_once())
+    second_client, second_messages = asyncio.run(poll_once())
+    assert first_client is not second_client
+    assert first_messages == second_messages == [{'MessageId': '1', 'Body': 'body'}]
+
+
+def test_get_client_reuses_clients_within_loop():
+    async def get_twice():
+        try:
+            return (
+                await async_cloud.get_client('sqs'),
+                await async_cloud.get_client('sqs'),
+            )
+        finally:
+            await async_cloud.close_aws_clients()
+
+    first, second = asyncio.run(get_twice())
+    assert first is second
+
+
+def test_get_client_closes_clients_on_partial_failure(monkeypatch):
+    opened = []
+    closed = []
+
+    class FakeClient:
+        def __init__(self, service):
+            self.service = service
+
+        async def __aenter__(self):
+            if self.service == 'secretsmanager':
+                raise RuntimeError('boom')
+            opened.append(self.service)
+            return self
+
+        async def __aexit__(self, *exc_info):
+            closed.append(self.service)
+
+    class FakeSession:
+        def create_client(self, service, **kwargs):
+            return FakeClient(service)
+
+    monkeypatch.setattr(async_cloud, 'get_session', FakeSession)
+
+    async def get_sqs():
+        return await async_cloud.get_client('sqs')
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(get_sqs())
+    assert opened == ['sns', 'sqs']
+    assert sorted(closed) == ['sns', 'sqs']
@@ -0,0 +1,419 @@
+import time
+import pytest
+from botocore.stub import Stubber
+from nexus.helpers import cloud
+
+QUEUE_URL = 'https://sqs.us-east-2.amazonaws.com/123456789012/test-queue'
+
+
+# Build real clients with dummy credentials so requests can be stubbed
+@pytest.fixture
+def aws_env(monkeypatch):
+    monkeypatch.setenv('AWS_ACCESS_KEY_ID', 'testing')
+    monkeypatch.setenv('AWS_SECRET_ACCESS_KEY', 'testing')
+    monkeypatch.setenv('REGION', 'us-east-2')
+
+
+@pytest.fixture
+def clients(aws_env, monkeypatch):
+    monkeypatch.setattr(cloud, 'aws_session', None)
+    monkeypatch.setattr(cloud, 'aws_clients', cloud.get_aws_clients())
+    monkeypatch.setattr(cloud, '_aws_clients_created_at', time.monotonic())
+    return cloud.aws_clients
+
+
+@pytest.fixture
+def sqs_stub(clients):
+    with Stubber(clients['sqs']) as stubber:
+        yield stubber
+        stubber.assert_no_pending_responses()
+
+
+# Test client lifetime
+def test_get_client_recycles_expired_clients(clients, monkeypatch):
+    session = cloud.aws_session
+    closed = []
+    for name, client in clients.items():
+        monkeypatch.setattr(client, 'close', lambda name=name: closed.append(name))
+    settings_reads = []
+    monkeypatch.setattr(cloud, 'get_aws_settings', lambda: settings_reads.append(1))
+
+    # Fresh clients are reused
+    assert cloud.get_client('sqs') is clients['sqs']
+    assert closed == []
+
+    # Expired clients are rebuilt from the same session and closed
+    monkeypatch.setattr(
+        cloud,
+        '_aws_clients_created_at',
+        time.monotonic() - cloud.AWS_CLIENT_MAX_AGE - 1
+    )
+    new_sqs = cloud.get_client('sqs')
+    assert new_sqs is not clients['sqs']
+    assert cloud.aws_session is session
+    assert settings_reads == []
+    assert sorted(closed) == ['secretsmanager', 'sns', 'sqs']
+    assert cloud.get_client('sqs') is new_sqs
+
+
+# Test SQS message deletion
+def test_delete_sqs_messages_chunks_by_ten(sqs_stub):
+    handles = [f'h{i}' for i in range(12)]
+    sqs_stub.add_response(
+        'delete_message_batch',
+        {'Successful': [{'Id': str(i)} for i in range(10)], 'Failed': []},
+        {
+            'QueueUrl': QUEUE_URL,
+            'Entries': [
+                {'Id': str(i), 'ReceiptHandle': f'h{i}'} for i in range(10)
+            ],
+        },
+    )
+    sqs_stub.add_response(
+        'delete_message_batch',
+        {'Successful': [{'Id': '10'}, {'Id': '11'}], 'Failed': []},
+        {
+            'QueueUrl': QUEUE_URL,
+            'Entries': [
+                {'Id': '10', 'ReceiptHandle': 'h10'},
+                {'Id': '11', 'ReceiptHandle': 'h11'},
+            ],
+        },
+    )
+    cloud.delete_sqs_messages(QUEUE_URL, handles)
+
+
+def test_delete_sqs_messages_reports_failed_handles(sqs_stub):
+    handles = [f'h{i}' for i in range(12)]
+    sqs_stub.add_response(
+        'delete_message_batch',
+        {
+            'Successful': [{'Id': str(i)} for i in range(10) if i != 1],
+            'Failed': [{
+                'Id': '1',
+                'SenderFault': True,
+                'Code': 'ReceiptHandleIsInvalid',
+            }],
+        },
+    )
+    sqs_stub.add_response(
+        'delete_message_batch',
+        {
+            'Successful': [{'Id': '10'}],
+            'Failed': [{
+                'Id': '11',
+                'SenderFault': True,
+                'Code': 'ReceiptHandleIsInvalid',
+            }],
+        },
+    )
+    with pytest.raises(cloud.SQSDeleteError) as excinfo:
+        cloud.delete_sqs_messages(QUEUE_URL, handles)
+    assert "['h1', 'h11']" in str(excinfo.value)
+    assert excinfo.value.code == 'ReceiptHandleIsInvalid'
+
+
+def test_delete_sqs_messages_wraps_client_error(sqs_stub):
+    sqs_stub.add_client_error(
+        'delete_message_batch',
+        service_error_code='AWS.SimpleQueueService.NonExistentQueue',
+    )
+    with pytest.raises(cloud.SQSDeleteError) as excinfo:
+        cloud.delete_sqs_messages(QUEUE_URL, ['h0'])
+    assert excinfo.value.code == 'AWS.SimpleQueueService.NonExistentQueue'
+
+
+def test_delete_sqs_message(sqs_stub):
+    sqs_stub.add_response(
+        'delete_message_batch',
+        {'Successful': [{'Id': '0'}], 'Failed': []},
+        {
+            'QueueUrl': QUEUE_URL,
+            'Entries': [{'Id': '0', 'ReceiptHandle': 'h0'}],
+        },
+    )
+    cloud.delete_sqs_message(QUEUE_URL, 'h0')
+
+
+def test_delete_sqs_message_reports_code(sqs_stub):
+    sqs_stub.add_response(
+        'delete_message_batch',
+        {
+            'Successful': [],
+            'Failed': [{
+                'Id': '0',
+                'SenderFault': True,
+                'Code': 'ReceiptHandleIsInvalid',
+            }],
+        },
+    )
+    with pytest.raises(cloud.SQSDeleteError) as excinfo:
+        cloud.delete_sqs_message(QUEUE_URL, 'h0')
+    assert excinfo.value.code == 'ReceiptHandleIsInvalid'
+
+
+@pytest.fixture
+def secrets_stub(clients, monkeypatch):
+    monkeypatch.setattr(cloud, '_secret_cache', cloud.TTLCache(maxsize=128, ttl=3600))
+    with Stubber(clients['secretsmanager']) as stubber:
+        yield stubber
+        stubber.assert_no_pending_responses()
+
+
+# Test secret retrieval and caching
+def test_retrieve_secret_caches_parsed_secret(secrets_stub):
+    secrets_stub.add_response(
+        'get_secret_value',
+        {'SecretString': '{"key": "value"}'},
+        {'SecretId': 'test/secret'},
+    )
+    assert cloud.retrieve_secret('test/secret') == {'key': 'value'}
+    # Second lookup is served from the cache, no stubbed response left
+    assert cloud.retrieve_secret('test/secret') == {'key': 'value'}
+
+
+def test_retrieve_secret_returns_copy(secrets_stub):
+    secrets_stub.add_response(
+        'get_secret_value',
+        {'SecretString': '{"key": "value"}'},
+    )
+    secret = cloud.retrieve_secret('test/secret')
+    secret['key'] = 'changed'
+    assert cloud.retrieve_secret('test/secret') == {'key': 'value'}
+
+
+def test_retrieve_secret_misses_per_name(secrets_stub):
+    secrets_stub.add_response(
+        'get_secret_value',
+        {'SecretString': '{"key": "first"}'},
+        {'SecretId': 'test/first'},
+    )
+    secrets_stub.add_response(
+        'get_secret_value',
+        {'SecretString': '{"key": "second"}'},
+        {'SecretId': 'test/second'},
+    )
+    assert cloud.retrieve_secret('test/first') == {'key': 'first'}
+    assert cloud.retrieve_secret('test/second') == {'key': 'second'}
+
+
+@pytest.mark.parametrize('secret_string, expected', [
+    ('"plain-passphrase"', 'plain-passphrase'),
+    ('[1, 2]', [1, 2]),
+])
+def test_retrieve_secret_caches_non_object_secrets(secrets_stub, secret_string, expected):
+    secrets_stub.add_response(
+        'get_secret_value',
+        {'SecretString': secret_string},
+    )
+    assert cloud.retrieve_secret('test/secret') == expected
+    assert cloud.retrieve_secret('test/secret') == expected
+
+
+@pytest.fixture
+def sns_stub(clients):
+    with Stubber(clients['sns']) as stubber:
+        yield stubber
+        stubber.assert_no_pending_responses()
+
+
+TOPIC_ARN = 'arn:aws:sns:us-east-2:123456789012:test-topic'
+
+
+# Test batched SNS publishing
+def test_publish_sns_messages_aggregates_batches(sns_stub):
+    messages = [f'm{i}' for i in range(12)]
+    sns_stub.add_response(
+        'publish_batch',
+        {
+            'Successful': [{'Id': str(i), 'MessageId': f'id{i}'} for i in range(10)],
+            'Failed': [],
+        },
+        {
+            'TopicArn': TOPIC_ARN,
+            'PublishBatchRequestEntries': [
+                {'Id': str(i), 'Message': f'm{i}'} for i in range(10)
+            ],
+        },
+    )
+    sns_stub.add_response(
+        'publish_batch',
+        {
+            'Successful': [{'Id': '10', 'MessageId': 'id10'}],
+            'Failed': [{'Id': '11', 'Code': 'InternalError', 'SenderFault': False}],
+        },
+        {
+            'TopicArn': TOPIC_ARN,
+            'PublishBatchRequestEntries': [
+                {'Id': '10', 'Message': 'm10'},
+                {'Id': '11', 'Message': 'm11'},
+            ],
+        },
+    )
+    result = cloud.publish_sns_messages(messages, TOPIC_ARN)
+    assert [entry['Id'] for entry in result['Successful']] == [str(i) for i in range(11)]
+    assert [entry['Id'] for entry in result['Failed']] == ['11']
+
+
+def test_publish_sns_messages_splits_by_payload_size():
+    large = 'x' * (100 * 1024)
+    batches = cloud._sns_batches([large, large, large, 'small'])
+    assert [[entry['Id'] for entry in batch] for batch in batches] == [
+        ['0', '1'],
+        ['2', '3'],
+    ]
+
+
+def test_publish_sns_messages_attaches_partial_result(sns_stub):
+    messages = [f'm{i}' for i in range(11)]
+    sns_stub.add_response(
+        'publish_batch',
+        {
+            'Successful': [{'Id': str(i), 'MessageId': f'id{i}'} for i in range(10)],
+            'Failed': [],
+        },
+    )
+    sns_stub.add_client_error('publish_batch', service_error_code='Throttled')
+    with pytest.raises(cloud.SNSPublishError) as excinfo:
+        cloud.publish_sns_messages(messages, TOPIC_ARN)
+    assert excinfo.value.code == 'Throttled'
+    assert len(excinfo.value.result['Successful']) == 10
+
+
+@pytest.fixture
+def gpg_home(tmp_path, monkeypatch):
+    home = tmp_path / 'gnupg'
+    home.mkdir(mode=0o700)
+    monkeypatch.setattr(cloud, 'gpg_instance', cloud.gnupg.GPG(gnupghome=str(home)))
+
+
+@pytest.fixture
+def encrypted_env(gpg_home, tmp_path):
+    env_file = tmp_path / '.env.plain'
+    env_file.write_text('A=1\n\n  B=2  \n\n')
+    encrypted_file = tmp_path / '.env.gpg'
+    cloud.encrypt_env_file('passphrase', str(env_file), str(encrypted_file))
+    return encrypted_file
+
+
+# Test env file encryption and decryption
+def test_decrypt_env_file_round_trip(encrypted_env, tmp_path):
+    output_file = tmp_path / '.env'
+    cloud.decrypt_env_file('passphrase', str(encrypted_env), str(output_file))
+    assert output_file.read_text() == 'A=1\nB=2'
+    assert not (tmp_path / '.env.tmp').exists()
+
+
+def test_decrypt_env_file_removes_temp_file_on_failure(encrypted_env, tmp_path, monkeypatch):
+    def fail_replace(src, dst):
+        raise OSError('replace failed')
+
+    monkeypatch.setattr(cloud.os, 'replace', fail_replace)
+    output_file = tmp_path / '.env'
+    with pytest.raises(Exception, match='replace failed'):
+        cloud.decrypt_env_file('passphrase', str(encrypted_env), str(output_file))
+    assert not (tmp_path / '.env.tmp').exists()
+
+
+# Test AWS settings validation
+def test_get_aws_settings(aws_env):
+    assert cloud.get_aws_settings() == {
+        'aws_access_key_id': 'testing',
+        'aws_secret_access_key': 'testing',
+        'region_name': 'us-east-2',
+    }
+
+
+def test_get_aws_settings_allows_default_credential_chain(monkeypatch):
+    monkeypatch.delenv('AWS_ACCESS_KEY_ID', raising=False)
+    monkeypatch.delenv('AWS_SECRET_ACCESS_KEY', raising=False)
+    monkeypatch.setenv('REGION', 'us-east-2')
+    assert cloud.get_aws_settings()['aws_access_key_id'] is None
+
+
+def test_get_aws_settings_requires_region(aws_env, monkeypatch):
+    monkeypatch.delenv('REGION')
+    with pytest.raises(Exception, match='REGION'):
+        cloud.get_aws_settings()
+
+
+def test_get_aws_settings_rejects_partial_credentials(aws_env, monkeypatch):
+    monkeypatch.delenv('AWS_SECRET_ACCESS_KEY')
+    with pytest.raises(Exception, match='missing or incomplete'):
+        cloud.get_aws_settings()
+
+
+# Test AWS client warm-up
+def test_warm_up_aws_clients_logs_failures(clients, monkeypatch):
+    messages = []
+    monkeypatch.setattr(cloud.logger, 'info', lambda message: messages.append(('info', message)))
+    monkeypatch.setattr(cloud.logger, 'warning', lambda message: messages.append(('warning', message)))
+    with Stubber(clients['sns']) as sns, Stubber(clients['sqs']) as sqs, \
+            Stubber(clients['secretsmanager']) as secretsmanager:
+        sns.add_response('list_topics', {'Topics': []})
+        sqs.add_client_error('list_queues', service_error_code='AccessDenied')
+        secretsmanager.add_client_error('list_secrets', service_error_code='AccessDeniedException')
+        cloud.warm_up_aws_clients()
+    assert messages == [
+        ('info', 'AWS sqs warm-up call returned AccessDenied, connection is warm'),
+        ('info', 'AWS secretsmanager warm-up call returned AccessDeniedException, connection is warm'),
+    ]
+
+
+def test_warm_up_aws_clients_logs_unexpected_errors(monkeypatch):
+    warnings = []
+    monkeypatch.setattr(cloud.logger, 'warning', warnings.append)
+    monkeypatch.delenv('REGION', raising=False)
+    monkeypatch.setattr(cloud, 'aws_session', None)
+    monkeypatch.setattr(cloud, 'aws_clients', None)
+    cloud.warm_up_aws_clients()
+    assert len(warnings) == 3
+    assert all('REGION' in warning for warning in warnings)
+
+
+# Test typed errors carry the AWS error code
+@pytest.mark.parametrize('service, operation, call, error', [
+    ('sns', 'publish', lambda: cloud.publish_sns_message('data', TOPIC_ARN), cloud.SNSPublishError),
+    ('sns', 'subscribe', lambda: cloud.subscribe_sqs_to_sns('arn:aws:sqs:us-east-2:123456789012:q', TOPIC_ARN),
+     cloud.SNSSubscribeError),
+    ('sqs', 'receive_message', lambda: cloud.poll_sqs_message(QUEUE_URL), cloud.SQSPollError),
+    ('sqs', 'receive_message', lambda: cloud.poll_many_queues([QUEUE_URL]), cloud.SQSPollError),
+    ('secretsmanager', 'get_secret_value', lambda: cloud.retrieve_secret('test/missing'), cloud.SecretRetrievalError),
+])
+def test_typed_errors_carry_code(clients, monkeypatch, service, operation, call, error):
+    monkeypatch.setattr(cloud, '_secret_cache', cloud.TTLCache(maxsize=128, ttl=3600))
+    with Stubber(clients[service]) as stubber:
+        stubber.add_client_error(operation, service_error_code='ThrottlingException')
+        with pytest.raises(error) as excinfo:
+            call()
+    assert isinstance(excinfo.value, cloud.CloudError)
+    assert excinfo.value.code == 'ThrottlingException'
+
+
+# Test polling multiple SQS queues
+def test_poll_many_queues(monkeypatch):
+    def fake_poll(queue_url, max_messages, wait_time_seconds):
+        return [{'MessageId': queue_url}]
+
+    monkeypatch.setattr(cloud, 'poll_sqs_message', fake_poll)
+    assert cloud.poll_many_queues(['q1', 'q2']) == {
+        'q1': [{'MessageId': 'q1'}],
+        'q2': [{'MessageId': 'q2'}],
+    }
+
+
+def test_poll_many_queues_keeps_messages_on_failure(monkeypatch):
+    def fake_poll(queue_url, max_messages, wait_time_seconds):
+        if queue_url == 'bad':
+            raise cloud.SQSPollError('Failed to poll messages from SQS queue', 'AccessDenied')
+        return [{'MessageId': queue_url}]
+
+    monkeypatch.setattr(cloud, 'poll_sqs_message', fake_poll)
+    with pytest.raises(cloud.SQSPollError) as excinfo:
+        cloud.poll_many_queues(['good1', 'bad', 'good2'])
+    assert "['bad']" in str(excinfo.value)
+    assert excinfo.value.code == 'AccessDenied'
+    assert excinfo.value.result == {
+        'good1': [{'MessageId': 'good1'}],
+        'good2': [{'MessageId': 'good2'}],
+    }